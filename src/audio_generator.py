@@ -1,8 +1,41 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
+import re
+import logging
+import time
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+
+try:
+    from orjson import dumps as _dumps
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+logger = logging.getLogger(__name__)
 
 class AudioGenerator:
+    # SSML substitutions applied to each sentence: emphasis for specific
+    # phrases and pauses after punctuation
+    _SSML_RULES = {
+        "σοβαρά": "<prosody pitch='+20%' rate='90%'>σοβαρά</prosody>",
+        "τέλειο": "<prosody pitch='+30%' rate='120%'>τέλειο</prosody>",
+        "χαχα": "<prosody pitch='+20%' volume='+2db'>χαχα</prosody>",
+        "...": "... <break time='800ms'/>",
+        ",": ", <break time='300ms'/>",
+        ";": "; <break time='500ms'/>",
+    }
+    # Longest keys first so "..." wins over any shorter overlapping rule
+    _SSML_RE = re.compile("|".join(map(re.escape, sorted(_SSML_RULES, key=len, reverse=True))))
+    # A sentence body followed by its terminator run (".", "!", "?!", "...");
+    # terminators only count before whitespace so "10.000" stays intact
+    _SENTENCE_RE = re.compile(r"(.+?)([.!?]+(?=\s|$)|$)", re.S)
+
     def __init__(self, api_key):
         self.api_key = api_key
         self.base_url = "https://api.elevenlabs.io/v1"
@@ -11,54 +44,78 @@ class AudioGenerator:
             "Content-Type": "application/json",
             "xi-api-key": self.api_key
         }
+        
+        # Reuse one pooled connection to ElevenLabs across requests. Every TTS
+        # POST is billed, so only requests the server never handled are
+        # replayed: failed connects and 429/503 rejections, after any
+        # Retry-After delay. A read timeout or other 5xx may follow a finished
+        # synthesis, so those surface to the caller instead
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                read=0,
+                backoff_factor=0.3,
+                status_forcelist=[429, 503],
+                allowed_methods=frozenset({"POST"}),
+                respect_retry_after_header=True
+            )
+        ))
+        
+        # On-disk cache of generated audio, keyed by the request contents
+        self.cache_dir = Path(os.getenv("TTS_CACHE_DIR", ".tts_cache"))
+        self.cache_ttl = int(os.getenv("TTS_CACHE_TTL", 7 * 24 * 3600))
+    
+    def _cache_key(self, formatted_text, voice_id, voice_settings, model_id):
+        """Hash everything that affects the synthesized audio."""
+        payload = json.dumps({
+            "t": formatted_text,
+            "v": voice_id,
+            "s": voice_settings,
+            "m": model_id
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
     def _format_news_text(self, text):
         """Format text with simple prosody adjustments for Gen Z style."""
-        # Split text into sentences
-        sentences = text.split('.')
-        formatted_sentences = []
+        out = []
         
-        for sentence in sentences:
-            if not sentence.strip():
+        # Walk sentences in one pass, keeping the terminator that ended each
+        for match in self._SENTENCE_RE.finditer(text):
+            body = match.group(1).strip()
+            if not body:
                 continue
-                
-            # Base prosody for the sentence
-            s = sentence.strip()
+            terminator = match.group(2)
+            s = body + terminator
             
             # Add emphasis for exclamations
-            if "!" in s:
+            if "!" in terminator:
                 s = f"<prosody pitch='+30%' rate='120%'>{s}</prosody>"
             
             # Add curiosity for questions
-            elif "?" in s:
+            elif "?" in terminator:
                 s = f"<prosody pitch='+20%' rate='90%'>{s}</prosody>"
             
-            # Add emphasis for specific phrases
-            s = s.replace("σοβαρά", "<prosody pitch='+20%' rate='90%'>σοβαρά</prosody>")
-            s = s.replace("τέλειο", "<prosody pitch='+30%' rate='120%'>τέλειο</prosody>")
-            s = s.replace("χαχα", "<prosody pitch='+20%' volume='+2db'>χαχα</prosody>")
+            # Add emphasis for specific phrases and pauses in a single pass
+            s = self._SSML_RE.sub(lambda m: self._SSML_RULES[m.group(0)], s)
             
-            # Add pauses
-            s = s.replace(",", ", <break time='300ms'/>")
-            s = s.replace(";", "; <break time='500ms'/>")
-            s = s.replace("...", "... <break time='800ms'/>")
+            # Pause between sentences ("..." already carries a longer break)
+            if terminator and "..." not in terminator:
+                s += " <break time='500ms'/>"
             
-            formatted_sentences.append(s)
-        
-        # Join sentences with appropriate breaks
-        text = ". <break time='500ms'/>".join(formatted_sentences)
+            out.append(s)
         
         # Wrap in speak tags
-        text = f"<speak>{text}</speak>"
-        
-        return text
+        return "<speak>" + " ".join(out) + "</speak>"
 
     def create_audio(self, text, output_file="test_news_audio.mp3"):
         """Generate audio using ElevenLabs TTS with Gen Z style."""
         try:
             # Format text with SSML tags
             formatted_text = self._format_news_text(text)
-            print(f"Formatted text: {formatted_text[:100]}...")
             
             # Voice settings for a young, energetic voice
             voice_settings = {
@@ -78,24 +135,50 @@ class AudioGenerator:
             # Make the API request
             # Using Antoni voice ID (better for multilingual content)
             voice_id = "ErXwobaYiN019PkySvjV"
-            url = f"{self.base_url}/text-to-speech/{voice_id}"
-            print(f"Making request to: {url}")
-            print(f"Headers: {json.dumps(self.headers, indent=2)}")
-            print(f"Data: {json.dumps(data, indent=2)}")
-            
-            response = requests.post(url, headers=self.headers, json=data)
             
-            if response.status_code == 200:
-                # Save audio to file
-                with open(output_file, 'wb') as f:
-                    f.write(response.content)
-                
-                print(f"Audio generated successfully and saved as {output_file}")
+            # Reuse previously generated audio for identical requests
+            key = self._cache_key(formatted_text, voice_id, voice_settings, data["model_id"])
+            cached_file = self.cache_dir / f"{key}.mp3"
+            if cached_file.exists():
+                shutil.copyfile(cached_file, output_file)
+                print(f"Audio loaded from cache and saved as {output_file}")
                 return True
-            else:
-                print(f"Error: API request failed with status code {response.status_code}")
-                print(f"Response: {response.text}")
-                return False
+            
+            url = f"{self.base_url}/text-to-speech/{voice_id}"
+            # Log sizes only: the body can be large and the headers hold the API key
+            logger.debug("POST %s headers=%d text_chars=%d", url, len(self.headers), len(formatted_text))
+            
+            # Stream the response so the MP3 is written as bytes arrive
+            # instead of being buffered in memory first
+            with self._session.post(url, data=_dumps(data), stream=True) as response:
+                if response.status_code == 200:
+                    # Write to a temp file first and move it into the cache
+                    # atomically so concurrent runs never see partial audio
+                    self.cache_dir.mkdir(parents=True, exist_ok=True)
+                    fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+                    try:
+                        with os.fdopen(fd, 'wb') as f:
+                            for chunk in response.iter_content(chunk_size=8192):
+                                f.write(chunk)
+                        os.replace(temp_path, cached_file)
+                    except Exception:
+                        if os.path.exists(temp_path):
+                            os.remove(temp_path)
+                        raise
+                    
+                    # Sidecar metadata so stale entries can be evicted externally
+                    with open(self.cache_dir / f"{key}.json", 'w') as f:
+                        json.dump({"created_at": time.time(), "ttl": self.cache_ttl}, f)
+                    
+                    # Save audio to file
+                    shutil.copyfile(cached_file, output_file)
+                    
+                    print(f"Audio generated successfully and saved as {output_file}")
+                    return True
+                else:
+                    print(f"Error: API request failed with status code {response.status_code}")
+                    print(f"Response: {response.text}")
+                    return False
             
         except Exception as e:
             print(f"Error generating audio: {str(e)}")
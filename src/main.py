@@ -1,5 +1,6 @@
 import os
 import argparse
+import logging
 from datetime import datetime
 from dotenv import load_dotenv, find_dotenv
 from typing import List, Dict
@@ -16,6 +17,9 @@ from test_avatar import test_story  # Import the test story
 
 load_dotenv()
 
+# Progress from the pipeline modules; set DEBUG for per-caption details
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
 def parse_args():
     parser = argparse.ArgumentParser(description='Generate TikTok news videos with celebrity avatars')
     parser.add_argument('--date', type=str, help='Date to fetch news for (YYYY-MM-DD)',
@@ -1,18 +1,166 @@
+import io
 import os
-from typing import List, Dict
-from datetime import datetime
+import re
+import json
+import xml.etree.ElementTree as ET
+import heapq
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import List, Dict, Optional
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
 import feedparser
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from dateutil import parser as date_parser
+except ImportError:
+    date_parser = None
+
+try:
+    import orjson
+    _dumps, _loads = orjson.dumps, orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    _loads = json.loads
+
+@lru_cache(maxsize=8192)
+def _parse_feed_date(date_str: str) -> Optional[datetime]:
+    """
+    Parse an RSS/Atom date string, cached since feeds repeat dates across fetches.
+    
+    Args:
+        date_str (str): Date string from RSS feed
+        
+    Returns:
+        Optional[datetime]: Parsed datetime, or None if no parser understood it
+    """
+    # RFC 2822 covers the standard RSS pubDate formats
+    try:
+        return parsedate_to_datetime(date_str)
+    except (TypeError, ValueError):
+        pass
+    
+    # ISO 8601 as used by Atom feeds
+    try:
+        return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+    except ValueError:
+        pass
+    
+    # Last resort: the generic (and much slower) dateutil parser
+    if date_parser is not None:
+        try:
+            return date_parser.parse(date_str)
+        except (ValueError, OverflowError):
+            pass
+    
+    return None
+
+# Namespaced tags read by the streaming feed parser
+_ATOM = '{http://www.w3.org/2005/Atom}'
+_CONTENT_ENCODED = '{http://purl.org/rss/1.0/modules/content/}encoded'
+_DC_DATE = '{http://purl.org/dc/elements/1.1/}date'
 
 class NewsFetcher:
+    # Common Greek news categories and their keywords, in priority order
+    _CATEGORY_KEYWORDS = {
+        'politics': ['politic', 'government', 'parliament', 'minister', 'election'],
+        'economy': ['econom', 'business', 'bank', 'finance', 'market'],
+        'society': ['health', 'education', 'work', 'social'],
+        'world': ['world', 'international', 'global', 'foreign'],
+        'sports': ['sport', 'football', 'basketball', 'game']
+    }
+    _CATEGORIES = tuple(_CATEGORY_KEYWORDS)
+    _KEYWORD_RANK = {
+        keyword: rank
+        for rank, keywords in enumerate(_CATEGORY_KEYWORDS.values())
+        for keyword in keywords
+    }
+    # One alternation over every keyword; the lookahead reports overlapping
+    # matches so a single scan sees every keyword the per-keyword checks would
+    _CATEGORY_RE = re.compile('(?=(' + '|'.join(map(re.escape, _KEYWORD_RANK)) + '))')
+    
+    # Relative importance of each category for the local pre-ranking
+    _CATEGORY_WEIGHTS = {
+        'politics': 1.0,
+        'economy': 0.9,
+        'world': 0.7,
+        'society': 0.6,
+        'sports': 0.4,
+        'general': 0.3
+    }
+    
+    # Article text kept per entry: the local score saturates at 1000 chars
+    # and the ranking and story prompts use at most the first 200
+    _MAX_CONTENT_CHARS = 1000
+    
+    # Refuse feeds larger than this to keep memory bounded
+    _MAX_FEED_BYTES = 10 * 1024 * 1024
+    
+    # Rankings kept for repeated candidate sets; the feeds only change a few
+    # times an hour, so a small LRU covers a long-running fetcher
+    _RANKING_CACHE_SIZE = 32
+    
+    # Ask for compressed feeds; requests decompresses them transparently
+    _FEED_HEADERS = {
+        'Accept-Encoding': 'gzip, deflate',
+        'User-Agent': 'headline_surfers/1.0'
+    }
+    
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.max_articles = int(os.getenv('MAX_ARTICLES', 10))
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
+        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:streamGenerateContent"
         
         if not api_key:
             raise ValueError("API key cannot be empty")
         
+        # Shared session so feed and Gemini requests reuse pooled connections
+        self._session = requests.Session()
+        self._session.headers.update({'Content-Type': 'application/json'})
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset({'GET'})
+            )
+        )
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        
+        # Ranking POSTs are billed and not idempotent, so Gemini gets its own
+        # adapter that only replays requests it rejected unprocessed: failed
+        # connects and 429/503, honouring Retry-After. Read timeouts and
+        # other server errors are left to the caller
+        self._session.mount('https://generativelanguage.googleapis.com/', HTTPAdapter(
+            max_retries=Retry(
+                total=3,
+                read=0,
+                backoff_factor=0.3,
+                status_forcelist=[429, 503],
+                allowed_methods=frozenset({'POST'}),
+                respect_retry_after_header=True
+            )
+        ))
+        
+        # Last downloaded copy of each feed plus its ETag/Last-Modified
+        # validators, used for conditional requests
+        self.feed_cache_dir = Path(os.getenv('FEED_CACHE_DIR', '.feed_cache'))
+        
+        # Gemini rankings keyed by a hash of the candidate titles, least
+        # recently used first and capped at _RANKING_CACHE_SIZE (32) entries
+        self._ranking_cache = OrderedDict()
+        
         # Define RSS feed sources
         self.sources = {
             'cyprus_mail': {
@@ -58,7 +206,8 @@ class NewsFetcher:
         except Exception as e:
             raise Exception(f"Error fetching news articles: {str(e)}")
     
-    def _parse_date(self, date_str: str) -> datetime:
+    @staticmethod
+    def _parse_date(date_str: str) -> datetime:
         """
         Parse date string from various formats used by different RSS feeds.
         
@@ -68,28 +217,202 @@ class NewsFetcher:
         Returns:
             datetime: Parsed datetime object
         """
-        formats = [
-            '%a, %d %b %Y %H:%M:%S %z',  # Standard RSS format
-            '%Y-%m-%dT%H:%M:%S%z',       # ISO format with timezone
-            '%Y-%m-%dT%H:%M:%S+%z',      # ISO format with + timezone
-            '%Y-%m-%d %H:%M:%S',         # Simple format
-            '%a, %d %b %Y %H:%M:%S GMT', # GMT format
-            '%Y-%m-%dT%H:%M:%SZ'         # UTC format
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
-                
-        # If no format matches, try parsing with dateutil
-        try:
-            from dateutil import parser
-            return parser.parse(date_str)
-        except:
+        parsed = _parse_feed_date(date_str)
+        if parsed is None:
             print(f"Could not parse date: {date_str}")
             return datetime.now()  # Return current time as fallback
+        return parsed
+    
+    def _fetch_one(self, source_id: str, source_info: Dict):
+        """
+        Download and parse a single RSS feed.
+        
+        Args:
+            source_id (str): Key of the source in self.sources
+            source_info (Dict): Source configuration with the feed URL
+            
+        Returns:
+            Optional[List[Dict]]: Parsed entries, or None if the feed could not be fetched
+        """
+        try:
+            print(f"Fetching from {source_id}...")
+            meta_path = self.feed_cache_dir / f"{source_id}.json"
+            body_path = self.feed_cache_dir / f"{source_id}.xml"
+            
+            # Send validators from the previous fetch so unchanged feeds
+            # come back as an empty 304 instead of the full document
+            meta = {}
+            if meta_path.exists() and body_path.exists():
+                with open(meta_path, 'r') as f:
+                    meta = json.load(f)
+            headers = dict(self._FEED_HEADERS)
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+            
+            with self._session.get(source_info['url'], headers=headers, timeout=10, stream=True) as response:
+                if response.status_code == 304:
+                    body = body_path.read_bytes()
+                else:
+                    body = self._read_limited(response)
+                    if response.status_code == 200:
+                        self._store_feed(meta_path, body_path, body, response.headers)
+            
+            if response.status_code == 404:
+                print(f"Error: Feed not found for {source_id}")
+                return None
+            
+            return self._parse_feed(body)
+        except Exception as e:
+            print(f"Error fetching from {source_id}: {str(e)}")
+            return None
+    
+    def _parse_feed(self, body: bytes) -> List[Dict]:
+        """
+        Parse a feed document into plain entry dicts.
+        
+        Args:
+            body (bytes): Raw RSS/Atom document
+            
+        Returns:
+            List[Dict]: Entries with title, link, published and content keys
+        """
+        try:
+            entries = list(self._iter_entries(body))
+            if entries:
+                return entries
+            # Well-formed but no RSS 2.0/Atom entries, e.g. an RSS 1.0/RDF
+            # feed: feedparser understands the other dialects
+        except ET.ParseError:
+            # Malformed XML (e.g. undeclared HTML entities): let feedparser's
+            # lenient heuristics recover what they can
+            pass
+        return [self._normalize_entry(entry) for entry in feedparser.parse(body).entries]
+    
+    @staticmethod
+    def _iter_entries(body: bytes):
+        """
+        Stream <item>/<entry> elements out of a well-formed feed.
+        
+        Each element is cleared once read so memory stays bounded by a
+        single entry rather than the whole document.
+        
+        Args:
+            body (bytes): Raw RSS/Atom document
+            
+        Yields:
+            Dict: Entry with title, link, published and content keys
+        """
+        for _, elem in ET.iterparse(io.BytesIO(body), events=('end',)):
+            if elem.tag == 'item':
+                yield {
+                    'title': elem.findtext('title'),
+                    'link': elem.findtext('link'),
+                    'published': elem.findtext('pubDate') or elem.findtext(_DC_DATE),
+                    'content': elem.findtext(_CONTENT_ENCODED) or elem.findtext('description') or ''
+                }
+                elem.clear()
+            elif elem.tag == _ATOM + 'entry':
+                link = elem.find(_ATOM + 'link')
+                yield {
+                    'title': elem.findtext(_ATOM + 'title'),
+                    'link': link.get('href') if link is not None else None,
+                    'published': elem.findtext(_ATOM + 'published') or elem.findtext(_ATOM + 'updated'),
+                    'content': elem.findtext(_ATOM + 'content') or elem.findtext(_ATOM + 'summary') or ''
+                }
+                elem.clear()
+    
+    @staticmethod
+    def _normalize_entry(entry) -> Dict:
+        """
+        Convert a feedparser entry to the dict shape produced by _iter_entries.
+        
+        Args:
+            entry: feedparser entry
+            
+        Returns:
+            Dict: Entry with title, link, published and content keys
+        """
+        # Extract content (try different fields as feeds vary)
+        content = ''
+        if hasattr(entry, 'content'):
+            content = entry.content[0].value
+        elif hasattr(entry, 'summary'):
+            content = entry.summary
+        elif hasattr(entry, 'description'):
+            content = entry.description
+        
+        return {
+            'title': entry.get('title'),
+            'link': entry.get('link'),
+            'published': entry.get('published') or entry.get('updated') or entry.get('pubDate'),
+            'content': content
+        }
+    
+    def _read_limited(self, response) -> bytes:
+        """
+        Read a streamed response body, refusing anything over _MAX_FEED_BYTES.
+        
+        Args:
+            response: Streamed requests response
+            
+        Returns:
+            bytes: Response body
+        """
+        content_length = response.headers.get('Content-Length')
+        if content_length and int(content_length) > self._MAX_FEED_BYTES:
+            raise ValueError(f"Feed too large ({content_length} bytes)")
+        
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=65536):
+            size += len(chunk)
+            if size > self._MAX_FEED_BYTES:
+                raise ValueError(f"Feed exceeds {self._MAX_FEED_BYTES} bytes")
+            chunks.append(chunk)
+        return b''.join(chunks)
+    
+    def _store_feed(self, meta_path: Path, body_path: Path, body: bytes, headers) -> None:
+        """
+        Save a downloaded feed and its validators for the next conditional request.
+        
+        Args:
+            meta_path (Path): Where to store the ETag/Last-Modified metadata
+            body_path (Path): Where to store the feed document
+            body (bytes): Feed document
+            headers: Response headers
+        """
+        self.feed_cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Write each file to its own temporary name and replace atomically,
+        # so a concurrent run never reads a partial feed or metadata file.
+        # The body goes first so the metadata never points at a missing feed
+        self._replace_file(body_path, body)
+        self._replace_file(meta_path, json.dumps({
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'cached_feed_path': str(body_path)
+        }).encode('utf-8'))
+    
+    @staticmethod
+    def _replace_file(path: Path, data: bytes) -> None:
+        """
+        Atomically replace a file with new contents.
+        
+        Args:
+            path (Path): File to write
+            data (bytes): New contents
+        """
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".part")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
     
     def _fetch_from_rss(self, target_date) -> List[Dict]:
         """
@@ -103,50 +426,47 @@ class NewsFetcher:
         """
         all_articles = []
         
-        for source_id, source_info in self.sources.items():
+        # Fetch all feeds concurrently; latency is bounded by the slowest feed
+        with ThreadPoolExecutor(max_workers=len(self.sources)) as executor:
+            feeds = list(executor.map(self._fetch_one, self.sources.keys(), self.sources.values()))
+        
+        for source_id, entries in zip(self.sources, feeds):
             try:
-                print(f"Fetching from {source_id}...")
-                feed = feedparser.parse(source_info['url'])
-                
-                if feed.get('status', 0) == 404:
-                    print(f"Error: Feed not found for {source_id}")
+                if entries is None:
                     continue
                     
-                for entry in feed.entries:
+                for entry in entries:
                     try:
-                        # Get published date from various possible fields
-                        date_str = entry.get('published', entry.get('updated', entry.get('pubDate')))
+                        date_str = entry['published']
                         if not date_str:
                             continue
                             
-                        # Parse the publication date
-                        pub_date = self._parse_date(date_str).date()
+                        # Parse the publication date; entries whose date cannot
+                        # be read are rejected rather than assumed to be today's
+                        pub_date = _parse_feed_date(date_str)
                         
                         # Skip if not from target date
-                        if pub_date != target_date:
+                        if pub_date is None or pub_date.date() != target_date:
                             continue
                         
-                        # Extract content (try different fields as feeds vary)
-                        content = ''
-                        if hasattr(entry, 'content'):
-                            content = entry.content[0].value
-                        elif hasattr(entry, 'summary'):
-                            content = entry.summary
-                        elif hasattr(entry, 'description'):
-                            content = entry.description
-                            
+                        if not entry['title'] or not entry['link']:
+                            continue
+                        
+                        content = entry['content']
                         article = {
-                            'title': entry.title,
-                            'content': content,
-                            'url': entry.link,
+                            'title': entry['title'],
+                            # Categorize on the full text but keep only what
+                            # ranking and story generation actually read
+                            'content': content[:self._MAX_CONTENT_CHARS],
+                            'url': entry['link'],
                             'source': source_id,
-                            'category': self._detect_category(entry.title, content),
+                            'category': self._detect_category(entry['title'], content),
                             'published': date_str
                         }
                         
                         all_articles.append(article)
                         
-                    except (AttributeError, ValueError) as e:
+                    except (KeyError, ValueError) as e:
                         print(f"Error processing article from {source_id}: {str(e)}")
                         continue
                         
@@ -168,22 +488,16 @@ class NewsFetcher:
         Returns:
             str: Detected category
         """
-        # Common Greek news categories and their keywords
-        categories = {
-            'politics': ['politic', 'government', 'parliament', 'minister', 'election'],
-            'economy': ['econom', 'business', 'bank', 'finance', 'market'],
-            'society': ['health', 'education', 'work', 'social'],
-            'world': ['world', 'international', 'global', 'foreign'],
-            'sports': ['sport', 'football', 'basketball', 'game']
-        }
-        
         text = (title + ' ' + (description or '')).lower()
         
-        for category, keywords in categories.items():
-            if any(keyword in text for keyword in keywords):
-                return category
-                
-        return 'general'
+        # Scan the text once and keep the highest-priority category seen
+        best = len(self._CATEGORIES)
+        for match in self._CATEGORY_RE.finditer(text):
+            best = min(best, self._KEYWORD_RANK[match.group(1)])
+            if best == 0:
+                break
+        
+        return self._CATEGORIES[best] if best < len(self._CATEGORIES) else 'general'
     
     def _rank_articles(self, articles: List[Dict]) -> List[Dict]:
         """
@@ -195,12 +509,45 @@ class NewsFetcher:
         Returns:
             List[Dict]: Ranked list of articles
         """
+        # Ranking is pointless when every article will be returned anyway
+        if len(articles) <= self.max_articles:
+            return articles
+        
         try:
-            # Prepare articles for ranking
-            articles_text = "\n\n".join([
-                f"Article {i}:\nTitle: {article['title']}\nCategory: {article['category']}\nContent: {article['content'][:200]}..."
-                for i, article in enumerate(articles)
-            ])
+            # Pre-filter with a cheap local score so only the strongest
+            # candidates are sent to Gemini
+            now = datetime.now(timezone.utc)
+            candidates = heapq.nlargest(
+                2 * self.max_articles, articles,
+                key=lambda article: self._local_score(article, now)
+            )
+            chosen = {id(article) for article in candidates}
+            remaining = [article for article in articles if id(article) not in chosen]
+            
+            # Reuse the ranking if these exact candidates were ranked before
+            cache_key = hashlib.sha256(
+                "\n".join(article['title'] for article in candidates).encode('utf-8')
+            ).hexdigest()
+            if cache_key in self._ranking_cache:
+                self._ranking_cache.move_to_end(cache_key)
+                return self._apply_ranking(candidates, self._ranking_cache[cache_key]) + remaining
+            
+            # Prepare articles for ranking, assembled in one buffer and joined once
+            buf = []
+            append = buf.append
+            for i, article in enumerate(candidates):
+                if i:
+                    append("\n\n")
+                append("Article ")
+                append(str(i))
+                append(":\nTitle: ")
+                append(article['title'])
+                append("\nCategory: ")
+                append(article['category'])
+                append("\nContent: ")
+                append(article['content'][:200])
+                append("...")
+            articles_text = "".join(buf)
             
             prompt = """You are an article ranking system. Your task is to analyze the given news articles and rank them by importance.
             Consider these factors:
@@ -217,11 +564,12 @@ class NewsFetcher:
             DO NOT include any other text, explanations, or formatting in your response.
             ONLY return the comma-separated numbers."""
 
-            # Make the API request
-            response = requests.post(
-                f"{self.base_url}?key={self.api_key}",
-                headers={'Content-Type': 'application/json'},
-                json={
+            # Make the API request, streaming so we can stop as soon as
+            # enough indices have arrived
+            needed = min(self.max_articles, len(candidates))
+            with self._session.post(
+                f"{self.base_url}?alt=sse&key={self.api_key}",
+                data=_dumps({
                     "contents": [{
                         "parts":[{
                             "text": articles_text + "\n\n" + prompt
@@ -237,16 +585,14 @@ class NewsFetcher:
                         "top_p": 0.8,
                         "top_k": 40
                     }
-                }
-            )
-            
-            response.raise_for_status()
-            result = response.json()
+                }),
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                ranked_indices_text = self._read_ranking_stream(response, needed, len(candidates)).strip()
             
             # Extract and validate the generated text
-            if 'candidates' in result and len(result['candidates']) > 0:
-                ranked_indices_text = result['candidates'][0]['content']['parts'][0]['text'].strip()
-                
+            if ranked_indices_text:
                 # Clean up the response - remove any non-numeric characters except commas
                 cleaned_indices = ''.join(char for char in ranked_indices_text if char.isdigit() or char == ',')
                 if not cleaned_indices:
@@ -256,19 +602,17 @@ class NewsFetcher:
                 try:
                     ranked_indices = [int(idx.strip()) for idx in cleaned_indices.split(',') if idx.strip()]
                     
-                    # Validate indices
-                    valid_indices = [idx for idx in ranked_indices if 0 <= idx < len(articles)]
+                    # Validate indices, keeping the first mention of each
+                    valid_indices = list(dict.fromkeys(idx for idx in ranked_indices if 0 <= idx < len(candidates)))
                     if not valid_indices:
                         raise ValueError("No valid article indices found")
                     
-                    # Reorder articles based on ranking
-                    ranked_articles = [articles[idx] for idx in valid_indices]
+                    self._ranking_cache[cache_key] = valid_indices
+                    if len(self._ranking_cache) > self._RANKING_CACHE_SIZE:
+                        self._ranking_cache.popitem(last=False)
                     
-                    # If some articles weren't ranked, append them at the end
-                    unranked_indices = set(range(len(articles))) - set(valid_indices)
-                    ranked_articles.extend(articles[idx] for idx in unranked_indices)
-                    
-                    return ranked_articles
+                    # Articles that were not sent to Gemini follow the ranked ones
+                    return self._apply_ranking(candidates, valid_indices) + remaining
                 except ValueError as e:
                     raise ValueError(f"Failed to parse indices: {str(e)}")
             else:
@@ -277,4 +621,83 @@ class NewsFetcher:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Error ranking articles: API request failed - {str(e)}")
         except Exception as e:
-            raise Exception(f"Error ranking articles: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Error ranking articles: {str(e)}")
+    
+    def _read_ranking_stream(self, response, needed: int, total: int) -> str:
+        """
+        Collect ranking text from a Gemini SSE stream.
+        
+        Args:
+            response: Streamed requests response from streamGenerateContent
+            needed (int): Number of distinct valid indices after which to stop reading
+            total (int): Number of ranked articles; indices must be below this
+            
+        Returns:
+            str: Ranking text received so far
+        """
+        text = ''
+        digits = ''  # Index still being received
+        seen = set()
+        for line in response.iter_lines():
+            if not line.startswith(b'data:'):
+                continue
+            event = _loads(line[5:])
+            if not event.get('candidates'):
+                continue
+            start = len(text)
+            for part in event['candidates'][0].get('content', {}).get('parts', []):
+                text += part.get('text', '')
+            
+            # Scan only the new text; an index is complete once a comma follows it
+            for pos in range(start, len(text)):
+                char = text[pos]
+                if char.isdigit():
+                    digits += char
+                elif char == ',':
+                    if digits and int(digits) < total:
+                        seen.add(int(digits))
+                    digits = ''
+                    if len(seen) >= needed:
+                        # Drop anything after this comma, which may still be cut off
+                        return text[:pos + 1]
+        return text
+    
+    def _apply_ranking(self, articles: List[Dict], ranked_indices: List[int]) -> List[Dict]:
+        """
+        Reorder articles by ranked indices.
+        
+        Args:
+            articles (List[Dict]): Articles that were ranked
+            ranked_indices (List[int]): Valid indices in ranked order
+            
+        Returns:
+            List[Dict]: Ranked articles, followed by any that weren't ranked
+        """
+        ranked_articles = [articles[idx] for idx in ranked_indices]
+        
+        # If some articles weren't ranked, append them at the end
+        unranked_indices = set(range(len(articles))) - set(ranked_indices)
+        ranked_articles.extend(articles[idx] for idx in unranked_indices)
+        
+        return ranked_articles
+    
+    def _local_score(self, article: Dict, now: datetime) -> float:
+        """
+        Cheap importance estimate from recency, category and content length.
+        
+        Args:
+            article (Dict): Article to score
+            now (datetime): Current time (timezone-aware)
+            
+        Returns:
+            float: Score between 0 and 1
+        """
+        published = self._parse_date(article['published'])
+        if published.tzinfo is None:
+            published = published.astimezone()  # Naive dates are local time
+        age_hours = (now - published).total_seconds() / 3600
+        recency = min(max(1.0 - age_hours / 24, 0.0), 1.0)
+        
+        return (0.4 * recency
+                + 0.3 * self._CATEGORY_WEIGHTS.get(article['category'], 0.0)
+                + 0.3 * min(len(article['content']) / 1000, 1.0))
\ No newline at end of file
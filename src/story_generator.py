@@ -1,18 +1,151 @@
 import os
-from typing import List, Dict
+import re
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+    _dumps, _loads = orjson.dumps, orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    _loads = json.loads
 
 class StoryGenerator:
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
-        print(f"API key: {self.api_key}")
-    def generate_story(self, articles: List[Dict]) -> str:
+    """
+    Gemini-backed story writer.
+    
+    Instances hold a pooled HTTP session and are safe to share across calls
+    and threads, so create one and reuse it instead of one per story.
+    """
+    # Everything static goes in this prefix and the articles always come
+    # last: Gemini's implicit caching keys on the prompt prefix, so new
+    # guidance must be added here rather than after the articles
+    _STATIC_PREFIX = """You are a Gen Z content creator who needs to transform formal news into engaging, 
+casual Greek content for a digital avatar to present. Use modern Greek slang, emojis, and Gen Z speaking style. 
+Keep the content informative but make it sound like a friend telling a story.
+The story should be around 1-2 minutes when spoken.
+
+Use the following markers in the text:
+- [PAUSE] for natural pauses between topics
+- [EMPHASIS] for words that should be emphasized
+- [EXCITED] for excited tone
+- [SERIOUS] for serious tone
+- [CURIOUS] for curious/questioning tone
+- [SMILE] for moments where the avatar should smile
+- [THINKING] for contemplative moments
+
+Create a compelling story that combines the news items below in an engaging way for Greek Gen Z audience.
+Use appropriate Greek Gen Z slang and style. Include the emotion markers naturally throughout the text
+to guide the avatar's presentation.
+
+The story MUST:
+1. Include at least 3 emotion markers
+2. Be between 150-450 words long
+3. Use [SERIOUS] for political/economic news
+4. Use [EXCITED] for positive developments
+5. Use [THINKING] for analysis/statistics
+6. Include [PAUSE] between topics
+7. Use [EMPHASIS] for key points or statistics"""
+    _ARTICLES_HEADER = """
+
+Here are today's top news articles:
+"""
+    
+    _GENERATION_CONFIG = {
+        "temperature": 0.7,
+        "maxOutputTokens": 1000,
+    }
+    
+    # Fields every article must carry to be turned into a story
+    _REQUIRED_FIELDS = frozenset(('title', 'content', 'source', 'category', 'published', 'url'))
+    
+    # Emotion markers the narration may use; any one satisfies the marker requirement
+    _MARKERS = ('PAUSE', 'EMPHASIS', 'EXCITED', 'SERIOUS', 'CURIOUS', 'SMILE', 'THINKING')
+    _MARKER_RE = re.compile(r"\[(?:" + "|".join(_MARKERS) + r")\]")
+    
+    # Counting matches avoids building the word list just to take its length
+    _WORD_RE = re.compile(r"\S+")
+    
+    # Stories packed into one request by generate_stories_batched
+    _MAX_BATCH_SIZE = 8
+    _BATCH_STORY_RE = re.compile(r"<story id=(\d+)>(.*?)</story>", re.S)
+    
+    # Lifetime of a cached story when STORY_CACHE is enabled
+    _STORY_CACHE_TTL = 86400
+    
+    # Explicit context caching of the static instructions (opt-in)
+    _CACHE_URL = "https://generativelanguage.googleapis.com/v1beta/cachedContents"
+    _CACHE_TTL = "3600s"
+    
+    def __init__(self, api_key: Optional[str] = None):
+        # Read the environment per instance so keys loaded from .env after
+        # import, or changed later, are picked up
+        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
+        if not self.api_key:
+            raise ValueError("API key cannot be empty: pass api_key or set GEMINI_API_KEY")
+        self.model = "gemini-1.5-flash"
+        self.base_url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent"
+        
+        # Keep TLS connections to Gemini warm across stories. Story POSTs are
+        # billed, so the adapter only replays requests Gemini never ran:
+        # failed connects and 429/503 rejections, with exponential backoff
+        # and Retry-After honoured. A read timeout or other 5xx may arrive
+        # after the story was generated, so those are not retried
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': 'application/json'})
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3,
+                read=0,
+                backoff_factor=0.3,
+                status_forcelist=[429, 503],
+                allowed_methods=frozenset({'POST'}),
+                respect_retry_after_header=True
+            )
+        ))
+    
+        # Gemini only caches prompts above a minimum token count, so the
+        # cache is opt-in and falls back to inline instructions on failure
+        self.use_context_cache = os.getenv('GEMINI_CONTEXT_CACHE') == '1'
+        self._cache_name: Optional[str] = None
+        self._cache_lock = threading.Lock()
+        
+        # Development cache of generated stories so replays and retries skip
+        # the API; off by default so production always gets fresh stories
+        self.story_cache_enabled = os.getenv('STORY_CACHE') == '1'
+        self.story_cache_dir = Path(os.path.expanduser(
+            os.getenv('STORY_CACHE_DIR', '~/.cache/headline_surfers/gemini')
+        ))
+    
+    def close(self):
+        """Close the pooled HTTP session."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def generate_story(self, articles: List[Dict], force_refresh: bool = False) -> str:
         """
         Generate a Gen Z style story from the news articles in Greek.
         
         Args:
             articles (List[Dict]): List of news articles
+            force_refresh (bool): Ignore any cached story and call the API
             
         Returns:
             str: Generated story in Greek Gen Z style
@@ -25,75 +158,38 @@ class StoryGenerator:
             
         try:
             # Validate article structure
-            required_fields = ['title', 'content', 'source', 'category', 'published', 'url']
-            for article in articles:
-                missing_fields = [field for field in required_fields if field not in article]
-                if missing_fields:
-                    raise Exception(f"Error generating story: Missing required fields {missing_fields} in article")
+            self._validate_articles(articles)
             
             # Prepare the context from articles
             context = self._prepare_context(articles)
             
-            prompt = """You are a Gen Z content creator who needs to transform formal news into engaging, 
-            casual Greek content for a digital avatar to present. Use modern Greek slang, emojis, and Gen Z speaking style. 
-            Keep the content informative but make it sound like a friend telling a story.
-            The story should be around 1-2 minutes when spoken.
-
-            Use the following markers in the text:
-            - [PAUSE] for natural pauses between topics
-            - [EMPHASIS] for words that should be emphasized
-            - [EXCITED] for excited tone
-            - [SERIOUS] for serious tone
-            - [CURIOUS] for curious/questioning tone
-            - [SMILE] for moments where the avatar should smile
-            - [THINKING] for contemplative moments
-
-            Here are today's top news articles:
-            """ + context + """
-            
-            Create a compelling story that combines these news items in an engaging way for Greek Gen Z audience.
-            Use appropriate Greek Gen Z slang and style. Include the emotion markers naturally throughout the text
-            to guide the avatar's presentation.
-            
-            The story MUST:
-            1. Include at least 3 emotion markers
-            2. Be between 150-450 words long
-            3. Use [SERIOUS] for political/economic news
-            4. Use [EXCITED] for positive developments
-            5. Use [THINKING] for analysis/statistics
-            6. Include [PAUSE] between topics
-            7. Use [EMPHASIS] for key points or statistics"""
+            user_text = self._ARTICLES_HEADER + context
+            cache_key = None
+            if self.story_cache_enabled:
+                cache_key = self._story_cache_key(user_text)
+                cached = None if force_refresh else self._load_cached_story(cache_key)
+                if cached is not None:
+                    return cached
             
             # Make the API request
-            response = requests.post(
-                f"{self.base_url}?key={self.api_key}",
-                headers={'Content-Type': 'application/json'},
-                json={
-                    "contents": [{
-                        "parts":[{"text": prompt}]
-                    }],
-                    "generationConfig": {
-                        "temperature": 0.7,
-                        "maxOutputTokens": 1000,
-                    }
-                }
-            )
+            response = self._post_story(user_text)
+            if response.status_code == 404 and self._cache_name:
+                # The cached instructions expired server-side; recreate and retry once
+                self._cache_name = None
+                response = self._post_story(user_text)
             
             response.raise_for_status()  # Raise an exception for bad status codes
-            result = response.json()
+            result = _loads(response.content)
             
             # Extract the generated text from the response
             if 'candidates' in result and len(result['candidates']) > 0:
                 story = result['candidates'][0]['content']['parts'][0]['text'].strip()
                 
                 # Verify story meets requirements
-                if not any(marker in story for marker in ['[PAUSE]', '[EMPHASIS]', '[EXCITED]', '[SERIOUS]', '[CURIOUS]', '[SMILE]', '[THINKING]']):
-                    raise Exception("Error generating story: Generated content does not contain required emotion markers")
-                    
-                words = len(story.split())
-                if not (150 <= words <= 450):
-                    raise Exception(f"Error generating story: Generated content length ({words} words) is outside target range (150-450 words)")
-                    
+                self._validate_story(story)
+                
+                if cache_key is not None:
+                    self._store_cached_story(cache_key, story)
                 return story
             else:
                 raise Exception("Error generating story: No content generated in the response")
@@ -105,6 +201,232 @@ class StoryGenerator:
         except Exception as e:
             raise Exception(f"Error generating story: {str(e)}")
     
+    def _validate_articles(self, articles: List[Dict]):
+        """
+        Check that every article carries the fields the prompt needs.
+        
+        Args:
+            articles (List[Dict]): List of news articles
+            
+        Raises:
+            Exception: If an article is missing required fields
+        """
+        for article in articles:
+            missing_fields = self._REQUIRED_FIELDS.difference(article)
+            if missing_fields:
+                raise Exception(f"Error generating story: Missing required fields {sorted(missing_fields)} in article")
+    
+    def _validate_story(self, story: str):
+        """
+        Check that a generated story has emotion markers and the target length.
+        
+        Args:
+            story (str): Generated story
+            
+        Raises:
+            Exception: If the story does not meet the requirements
+        """
+        if not self._MARKER_RE.search(story):
+            raise Exception("Error generating story: Generated content does not contain required emotion markers")
+            
+        words = sum(1 for _ in self._WORD_RE.finditer(story))
+        if not (150 <= words <= 450):
+            raise Exception(f"Error generating story: Generated content length ({words} words) is outside target range (150-450 words)")
+    
+    def _story_cache_key(self, user_text: str) -> str:
+        """Hash everything that determines the generated story."""
+        payload = json.dumps({
+            "u": self.base_url,
+            "p": self._STATIC_PREFIX + user_text,
+            "c": self._GENERATION_CONFIG
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _load_cached_story(self, key: str) -> Optional[str]:
+        """
+        Read a cached story if it exists and has not expired.
+        
+        Args:
+            key (str): Cache key from _story_cache_key
+            
+        Returns:
+            Optional[str]: Cached story, or None on a miss
+        """
+        path = self.story_cache_dir / f"{key}.json"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if time.time() - entry.get('created_at', 0) > self._STORY_CACHE_TTL:
+            return None
+        print("Story loaded from cache")
+        return entry.get('story')
+    
+    def _store_cached_story(self, key: str, story: str):
+        """
+        Write a story to the cache atomically.
+        
+        Args:
+            key (str): Cache key from _story_cache_key
+            story (str): Validated story to store
+        """
+        try:
+            self.story_cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.story_cache_dir, suffix=".part")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"created_at": time.time(), "story": story}, f, ensure_ascii=False)
+            os.replace(temp_path, self.story_cache_dir / f"{key}.json")
+        except OSError as e:
+            # A cache write failure must not lose an already generated story
+            print(f"Warning: could not cache story: {str(e)}")
+    
+    def _post_story(self, user_text: str, max_output_tokens: Optional[int] = None) -> requests.Response:
+        """
+        Send the story request, referencing the cached instructions when available.
+        
+        Args:
+            user_text (str): Per-request text that follows the static instructions
+            max_output_tokens (Optional[int]): Override for the output token limit
+            
+        Returns:
+            requests.Response: Raw Gemini response
+        """
+        generation_config = self._GENERATION_CONFIG
+        if max_output_tokens is not None:
+            generation_config = {**generation_config, "maxOutputTokens": max_output_tokens}
+        
+        cache_name = self._ensure_cache() if self.use_context_cache else None
+        if cache_name:
+            body = {
+                "cachedContent": cache_name,
+                "contents": [{
+                    "role": "user",
+                    "parts": [{"text": user_text}]
+                }],
+                "generationConfig": generation_config
+            }
+        else:
+            body = {
+                "contents": [{
+                    "parts":[{"text": self._STATIC_PREFIX + user_text}]
+                }],
+                "generationConfig": generation_config
+            }
+        
+        return self.session.post(f"{self.base_url}?key={self.api_key}", data=_dumps(body))
+    
+    def _ensure_cache(self) -> Optional[str]:
+        """
+        Create the cached copy of the static instructions on first use.
+        
+        Returns:
+            Optional[str]: Cache resource name, or None if caching is unavailable
+        """
+        with self._cache_lock:
+            if self._cache_name is None and self.use_context_cache:
+                try:
+                    response = self.session.post(
+                        f"{self._CACHE_URL}?key={self.api_key}",
+                        data=_dumps({
+                            "model": f"models/{self.model}",
+                            "contents": [{
+                                "role": "user",
+                                "parts": [{"text": self._STATIC_PREFIX}]
+                            }],
+                            "ttl": self._CACHE_TTL
+                        })
+                    )
+                    response.raise_for_status()
+                    self._cache_name = _loads(response.content)['name']
+                except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                    print(f"Context cache unavailable, sending full prompt: {str(e)}")
+                    self.use_context_cache = False
+            return self._cache_name
+    
+    def generate_stories(self, batches: List[List[Dict]], max_workers: int = 4) -> List[str]:
+        """
+        Generate one story per batch of articles, issuing the requests concurrently.
+        
+        Args:
+            batches (List[List[Dict]]): Article lists, one per story
+            max_workers (int): Maximum number of concurrent Gemini requests
+            
+        Returns:
+            List[str]: Generated stories in the same order as the batches
+            
+        Raises:
+            Exception: If any of the stories could not be generated
+        """
+        if not batches:
+            return []
+        
+        # The work is network-bound, so threads overlap the API round trips
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            return list(executor.map(self.generate_story, batches))
+    
+    def generate_stories_batched(self, batches: List[List[Dict]], batch_size: int = 4) -> List[str]:
+        """
+        Generate one story per batch of articles, packing several stories into each request.
+        
+        Args:
+            batches (List[List[Dict]]): Article lists, one per story
+            batch_size (int): Stories requested per Gemini call (capped at 8)
+            
+        Returns:
+            List[str]: Generated stories in the same order as the batches
+            
+        Raises:
+            Exception: If any batch is invalid or a story is missing from the response
+        """
+        if any(not articles for articles in batches):
+            raise Exception("No articles provided")
+        
+        # Larger batches make each call slower and the output harder to keep apart
+        batch_size = max(1, min(batch_size, self._MAX_BATCH_SIZE))
+        stories = []
+        
+        try:
+            for start in range(0, len(batches), batch_size):
+                group = batches[start:start + batch_size]
+                for articles in group:
+                    self._validate_articles(articles)
+                
+                buf = [f"\n\nProduce {len(group)} separate stories, one per input below, "
+                       f"each wrapped in <story id=K>...</story> where K is the input id. "
+                       f"Each story must meet all of the requirements above.\nINPUTS:"]
+                for i, articles in enumerate(group, 1):
+                    buf.append(f"\n<input id={i}>{self._prepare_context(articles)}</input>")
+                
+                response = self._post_story(
+                    "".join(buf),
+                    max_output_tokens=self._GENERATION_CONFIG["maxOutputTokens"] * len(group)
+                )
+                response.raise_for_status()
+                result = _loads(response.content)
+                
+                if not result.get('candidates'):
+                    raise Exception("Error generating story: No content generated in the response")
+                text = result['candidates'][0]['content']['parts'][0]['text']
+                
+                # Map each tagged story back to its input
+                found = {int(k): story.strip() for k, story in self._BATCH_STORY_RE.findall(text)}
+                for i in range(1, len(group) + 1):
+                    if i not in found:
+                        raise Exception(f"Error generating story: Story {start + i} missing from batched response")
+                    self._validate_story(found[i])
+                    stories.append(found[i])
+            
+            return stories
+            
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Error generating story: API request failed - {str(e)}")
+        except KeyError as e:
+            raise Exception(f"Error generating story: Missing required field {str(e)}")
+        except Exception as e:
+            raise Exception(f"Error generating story: {str(e)}")
+    
     def _prepare_context(self, articles: List[Dict]) -> str:
         """
         Prepare the context string from the articles.
@@ -116,14 +438,17 @@ class StoryGenerator:
             str: Formatted context string
         """
         try:
-            context = ""
+            parts = []
+            append = parts.append
             for i, article in enumerate(articles, 1):
-                context += f"\n{i}. {article['title']}\n"
-                context += f"   Category: {article['category']}\n"
-                context += f"   {article['content'][:200]}...\n"  # First 200 chars of content
-                context += f"   Source: {article['source']}\n"
+                append(
+                    f"\n{i}. {article['title']}\n"
+                    f"   Category: {article['category']}\n"
+                    f"   {article['content'][:200]}...\n"  # First 200 chars of content
+                    f"   Source: {article['source']}\n"
+                )
             
-            return context
+            return "".join(parts)
             
         except KeyError as e:
             raise Exception(f"Error preparing context: Missing required field {str(e)}")
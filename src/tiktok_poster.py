@@ -30,9 +30,13 @@ class TikTokPoster:
                     thumbnail_timestamp=0
                 )
             
+            # Parse the upload response once
+            data = response.json()
+            
             # Get the video URL
-            video_id = response.json()['video_id']
-            video_url = f"https://www.tiktok.com/@{response.json()['author']['unique_id']}/video/{video_id}"
+            video_id = data['video_id']
+            author_id = data['author']['unique_id']
+            video_url = f"https://www.tiktok.com/@{author_id}/video/{video_id}"
             
             return video_url
             
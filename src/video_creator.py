@@ -1,34 +1,263 @@
 import os
+import logging
 import random
 import time
+import subprocess
+import hashlib
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, List, Tuple, Optional
 import requests
 import ffmpeg
-import whisper
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import tempfile
 import re
 
+# Prefer faster-whisper (CTranslate2, int8) and fall back to openai-whisper
+try:
+    from faster_whisper import WhisperModel
+    import ctranslate2
+except ImportError:
+    WhisperModel = None
+    import whisper
+
+logger = logging.getLogger(__name__)
+
+# Caption text splitting: sentence terminators and whitespace runs
+_SENT_SPLIT_RE = re.compile(r'[.!?]+')
+_WS_RE = re.compile(r'\s+')
+
+# H.264 encoders in order of preference, with their options. The hardware
+# encoders keep the old 6 Mbps bitrate target; libx264 encodes at constant
+# quality (crf 23) capped at 6 Mbps, so simple footage comes out smaller
+# while busy gameplay never exceeds the hardware bitrate
+_H264_ENCODERS = {
+    'h264_nvenc': {'preset': 'p4', 'rc:v': 'cbr', 'b:v': '6M', 'profile:v': 'high'},
+    'h264_videotoolbox': {'b:v': '6M'},
+    'h264_qsv': {'preset': 'medium', 'b:v': '6M'},
+    'libx264': {'preset': 'veryfast', 'tune': 'fastdecode', 'crf': 23,
+                'maxrate': '6M', 'bufsize': '12M', 'threads': 0},
+}
+
+@lru_cache(maxsize=1)
+def _detect_h264_encoder() -> str:
+    """
+    Pick the fastest H.264 encoder that actually works on this machine.
+    
+    ffmpeg lists hardware encoders it was built with even when the device is
+    missing, so each candidate is confirmed with a tiny test encode.
+    
+    Returns:
+        str: Name of the encoder to pass as vcodec
+    """
+    try:
+        listed = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-encoders'],
+            capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return 'libx264'
+    
+    for encoder in _H264_ENCODERS:
+        if encoder == 'libx264' or encoder not in listed:
+            continue
+        try:
+            probe = subprocess.run(
+                ['ffmpeg', '-hide_banner', '-loglevel', 'error',
+                 '-f', 'lavfi', '-i', 'color=size=256x256:duration=0.1',
+                 '-c:v', encoder, '-f', 'null', '-'],
+                capture_output=True, timeout=10
+            )
+        except (OSError, subprocess.SubprocessError):
+            continue
+        if probe.returncode == 0:
+            return encoder
+    
+    return 'libx264'
+
+# openai-whisper installs kv-cache hooks on the shared model for each
+# transcribe call, so concurrent jobs (see create_batch) must take turns
+_TRANSCRIBE_LOCK = threading.Lock()
+
+@lru_cache(maxsize=2)
+def _load_whisper(name: str, device: Optional[str] = None):
+    """
+    Load a Whisper model once per process and share it between creators.
+    
+    Args:
+        name (str): Whisper model size, e.g. 'base' or 'tiny'
+        device (Optional[str]): 'cuda' or 'cpu', or None to pick automatically
+        
+    Returns:
+        The loaded Whisper model
+    """
+    if WhisperModel is None:
+        return whisper.load_model(name, device=device)
+    
+    # int8 weights run several times faster than the reference FP32 model
+    if device is None:
+        device = 'cuda' if ctranslate2.get_cuda_device_count() > 0 else 'cpu'
+    compute_type = 'int8_float16' if device == 'cuda' else 'int8'
+    return WhisperModel(name, device=device, compute_type=compute_type)
+
+@lru_cache(maxsize=32)
+def _load_font(name: str, size: int):
+    """
+    Load a TrueType font, cached so each size is parsed only once.
+    
+    Args:
+        name (str): Font name or path
+        size (int): Font size in pixels
+        
+    Returns:
+        ImageFont.FreeTypeFont: The loaded font
+    """
+    return ImageFont.truetype(name, size)
+
+# Whisper models expect 16 kHz mono float samples
+_WHISPER_SAMPLE_RATE = 16000
+
+def _decode_audio(audio_path: str) -> np.ndarray:
+    """
+    Decode an audio file to the 16 kHz mono float32 samples Whisper consumes.
+    
+    Args:
+        audio_path (str): Path to the audio file
+        
+    Returns:
+        np.ndarray: Samples in [-1, 1]
+    """
+    out, _ = (
+        ffmpeg
+        .input(audio_path)
+        .output('-', format='s16le', acodec='pcm_s16le', ac=1, ar=_WHISPER_SAMPLE_RATE)
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+# Caption fonts for the drawtext path, in order of preference; DejaVu ships
+# with most Linux distributions and covers Greek
+_CAPTION_FONTS = (
+    '/usr/share/fonts/truetype/msttcorefonts/Arial.ttf',
+    '/System/Library/Fonts/Supplemental/Arial.ttf',
+    '/Library/Fonts/Arial.ttf',
+    'C:/Windows/Fonts/arial.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+    '/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf',
+)
+
+@lru_cache(maxsize=1)
+def _find_caption_font() -> Optional[str]:
+    """
+    Locate a TrueType font file that drawtext can load.
+    
+    Returns:
+        Optional[str]: Path to the font, or None if none of the candidates exist
+    """
+    return next((path for path in _CAPTION_FONTS if os.path.exists(path)), None)
+
+@lru_cache(maxsize=None)
+def _has_ffmpeg_filter(name: str) -> bool:
+    """
+    Check whether the installed ffmpeg was built with a given filter.
+    
+    Args:
+        name (str): Filter name, e.g. 'drawtext'
+        
+    Returns:
+        bool: True if the filter is available
+    """
+    try:
+        listed = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-filters'],
+            capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return any(line.split()[1:2] == [name] for line in listed.splitlines())
+
+# Input options that let the GPU decode the gameplay source when its encoder
+# is in use; frames are copied back to system memory for the CPU filters
+_HWACCEL_INPUT = {
+    'h264_nvenc': {'hwaccel': 'cuda'},
+}
+
+def _probe_duration(path: str, stream: str) -> float:
+    """
+    Ask ffprobe for just the duration of one stream.
+    
+    Args:
+        path (str): Path to the media file
+        stream (str): Stream specifier, e.g. 'v:0' or 'a:0'
+        
+    Returns:
+        float: Duration in seconds; the container duration is used when the
+            stream does not report its own
+    """
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', stream,
+         '-show_entries', 'stream=duration:format=duration',
+         '-of', 'default=noprint_wrappers=1:nokey=1', path],
+        capture_output=True, text=True, check=True
+    )
+    for value in result.stdout.split():
+        try:
+            return float(value)
+        except ValueError:
+            continue  # 'N/A' for streams without a duration
+    raise ValueError(f"Could not determine duration of {path}")
+
+@lru_cache(maxsize=8)
+def _probe_video_duration(video_path: str, mtime: float) -> float:
+    """
+    Probe a video's duration, cached per file version.
+    
+    Args:
+        video_path (str): Path to the video file
+        mtime (float): Modification time, so a replaced file is probed again
+        
+    Returns:
+        float: Duration of the video stream in seconds
+    """
+    return _probe_duration(video_path, 'v:0')
+
 class VideoCreator:
-    def __init__(self):
+    # Bump when caption rendering changes so cached PNGs are not reused
+    _CAPTION_STYLE_VERSION = 2
+    
+    def __init__(self, hw_encoder: Optional[str] = None, model_name: str = "base"):
+        # H.264 encoder to use (e.g. 'h264_nvenc', or 'libx264' to force the
+        # CPU); the fastest working one is detected when left as None
+        self.hw_encoder = hw_encoder
         self.surfers_dir = "assets/subway_surfers"
         self.output_dir = "output"
         self.temp_dir = "temp"
         
+        # Output frame size is fixed for TikTok, so resolve it once
+        self._target_w, self._target_h = 1080, 1920
+        
+        # Rendered caption PNGs by (text, width, height)
+        self._caption_cache = {}
+        
         # Create necessary directories
         for dir_path in [self.surfers_dir, self.output_dir, self.temp_dir]:
             Path(dir_path).mkdir(parents=True, exist_ok=True)
         
-        # Initialize whisper model for transcription
-        self.model = whisper.load_model("base")
+        # Initialize whisper model for transcription (shared across instances)
+        self.model = _load_whisper(model_name)
     
     def get_video_duration(self, video_path: str) -> float:
         """Get the duration of a video file."""
-        probe = ffmpeg.probe(video_path)
-        video_info = next(s for s in probe['streams'] if s['codec_type'] == 'video')
-        return float(video_info['duration'])
+        # The gameplay source is the same for every video, so skip re-probing it
+        return _probe_video_duration(video_path, os.path.getmtime(video_path))
+    
+    @staticmethod
+    def clear_cache():
+        """Drop cached video probes, e.g. in long-running processes."""
+        _probe_video_duration.cache_clear()
     
     def get_random_start_time(self, video_path: str, required_duration: float) -> float:
         """Get a random start time that allows for the required duration."""
@@ -47,19 +276,29 @@ class VideoCreator:
             )
         return video_path
     
-    def generate_captions(self, audio_path: str) -> list:
-        """Generate captions from audio file using Whisper."""
-        print("Generating captions...")
-        result = self.model.transcribe(audio_path, language="el")  # Specify Greek language
-        return result["segments"]
-    
-    def create_caption_image(self, text: str, width: int, height: int) -> str:
-        """Create a caption image with the given text."""
-        # Create a transparent image
-        image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(image)
+    def generate_captions(self, audio) -> list:
+        """Generate captions from an audio file path or decoded 16 kHz samples using Whisper."""
+        logger.info("Generating captions...")
+        if WhisperModel is None:
+            with _TRANSCRIBE_LOCK:
+                result = self.model.transcribe(audio, language="el")  # Specify Greek language
+            return result["segments"]
         
-        # Split long text into multiple lines (max 30 chars per line)
+        # Silero VAD drops silent stretches before the encoder sees them;
+        # segment timestamps are mapped back to the original audio timeline
+        segments, _ = self.model.transcribe(
+            audio,
+            language="el",
+            vad_filter=True,
+            vad_parameters=dict(min_silence_duration_ms=500)
+        )
+        # faster-whisper yields segments lazily; materialize them as the same
+        # dicts openai-whisper returns so caption matching is unchanged
+        return [{'start': s.start, 'end': s.end, 'text': s.text} for s in segments]
+    
+    @staticmethod
+    def _wrap_caption(text: str) -> str:
+        """Split long caption text into lines of at most 30 characters."""
         words = text.split()
         lines = []
         current_line = []
@@ -79,22 +318,50 @@ class VideoCreator:
             lines.append(' '.join(current_line))
         
         # Join lines with newlines
-        text = '\n'.join(lines)
+        return '\n'.join(lines)
+    
+    @staticmethod
+    def _measure_text(font, lines: list):
+        """
+        Measure wrapped text from font metrics, without rasterizing it.
+        
+        Args:
+            font: Loaded PIL font
+            lines (list): Caption lines
+            
+        Returns:
+            Tuple of the text block width and height in pixels
+        """
+        line_height = font.getbbox("Ay")[3]
+        text_width = max((font.getlength(line) for line in lines), default=0)
+        text_height = line_height * len(lines) + 4 * (len(lines) - 1)  # PIL's default line spacing
+        return text_width, text_height
+    
+    def _fit_font(self, text: str, width: int, font_name: str = "Arial"):
+        """
+        Pick the largest font size (down to a minimum) that fits the caption width.
         
+        Args:
+            text (str): Wrapped caption text
+            width (int): Frame width in pixels
+            font_name (str): Font name or path to load
+            
+        Returns:
+            Tuple of the font, its size, and the text width and height
+        """
         # Start with a large font size but not too large
         font_size = 120  # Slightly smaller initial size
         min_font_size = 60  # Don't go smaller than this
         
         try:
-            font = ImageFont.truetype("Arial", font_size)
+            font = _load_font(font_name, font_size)
         except:
-            print("Warning: Arial font not found, using default font")
+            logger.warning("%s font not found, using default font", font_name)
             font = ImageFont.load_default()
         
-        # Calculate text size and position (use getbbox for multiline text)
-        bbox = draw.multiline_textbbox((0, 0), text, font=font, align='center')
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
+        # Calculate text size from the font's advance widths, no canvas needed
+        lines = text.split('\n')
+        text_width, text_height = self._measure_text(font, lines)
         
         # Scale down if text is too wide, but not below minimum
         if text_width > width - 100:  # Leave more padding
@@ -102,22 +369,84 @@ class VideoCreator:
             new_size = int(font_size * scale_factor)
             font_size = max(new_size, min_font_size)
             try:
-                font = ImageFont.truetype("Arial", font_size)
+                font = _load_font(font_name, font_size)
             except:
                 font = ImageFont.load_default()
-            bbox = draw.multiline_textbbox((0, 0), text, font=font, align='center')
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
+            text_width, text_height = self._measure_text(font, lines)
+        
+        return font, font_size, text_width, text_height
+    
+    def add_drawtext_captions(self, video, captions: list, fontfile: str, width: int):
+        """
+        Render captions with ffmpeg's drawtext filter instead of PNG overlays.
+        
+        Each caption is one drawtext filter that is only active during its
+        segment, so no images are written and no full-frame overlays are blended.
+        
+        Args:
+            video: ffmpeg-python video stream
+            captions (list): Caption dicts with text, start and end
+            fontfile (str): Path to the TrueType font to use
+            width (int): Frame width in pixels, used to size the font
+            
+        Returns:
+            The video stream with captions drawn on it
+        """
+        for segment in captions:
+            text = self._wrap_caption(segment['text'])
+            _, font_size, _, _ = self._fit_font(text, width, fontfile)
+            start, end = segment['start'], segment['end']
+            
+            video = video.filter(
+                'drawtext',
+                fontfile=fontfile,
+                text=text,
+                expansion='none',
+                fontsize=font_size,
+                fontcolor='white',
+                borderw=8,
+                bordercolor='black',
+                box=1,
+                boxcolor='black',
+                boxborderw=40,
+                x='(w-text_w)/2',
+                y='h*0.75',
+                enable=f'between(t,{start},{end})',
+                # Same 0.2s fade in/out as the PNG overlays
+                alpha=f'if(lt(t,{start}+0.2),(t-{start})/0.2,if(gt(t,{end}-0.2),({end}-t)/0.2,1))'
+            )
+        return video
+    
+    def create_caption_image(self, text: str, width: int, height: int) -> str:
+        """Create a caption image with the given text."""
+        # Identical captions (repeated taglines, reruns) reuse the same PNG
+        key = (text, width, height)
+        cached_path = self._caption_cache.get(key)
+        if cached_path and os.path.exists(cached_path):
+            return cached_path
+        
+        # Name the file after its content so reruns find it on disk too
+        digest = hashlib.sha1(f"{self._CAPTION_STYLE_VERSION}:{width}x{height}:{text}".encode('utf-8')).hexdigest()
+        temp_path = os.path.join(self.temp_dir, f"caption_{digest}.png")
+        if os.path.exists(temp_path):
+            self._caption_cache[key] = temp_path
+            return temp_path
+        
+        # Split long text into multiple lines (max 30 chars per line)
+        text = self._wrap_caption(text)
+        font, font_size, text_width, text_height = self._fit_font(text, width)
+        
+        # Create a transparent image once the final font size is known
+        image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
         
         # Center text horizontally and position near bottom
         x = (width - text_width) / 2
         y = height * 0.75  # Position a bit higher for multiline
         
-        print(f"\nCreating caption image:")
-        print(f"Text: {text}")
-        print(f"Font size: {font_size}")
-        print(f"Position: x={x}, y={y}")
-        print(f"Dimensions: width={text_width}, height={text_height}")
+        # One record per caption so captions rendered in parallel don't interleave
+        logger.debug("Creating caption image: text=%r font_size=%d position=(%s, %s) dimensions=%sx%s",
+                     text, font_size, x, y, text_width, text_height)
         
         # Create a solid black background box
         padding = 40
@@ -132,49 +461,53 @@ class VideoCreator:
         text_color = "white"  # Pure white for maximum contrast
         outline_width = 12  # Very thick outline
         
-        # Draw outline in all directions
-        for dx in range(-outline_width, outline_width + 1, 4):
-            for dy in range(-outline_width, outline_width + 1, 4):
-                draw.multiline_text((x + dx, y + dy), text, font=font, fill=outline_color, align='center')
-        
-        # Draw main text
-        draw.multiline_text((x, y), text, font=font, fill=text_color, align='center')
+        # Draw text and outline in one pass using the rasterizer's native stroke
+        draw.multiline_text((x, y), text, font=font, fill=text_color, align='center',
+                            stroke_width=outline_width, stroke_fill=outline_color)
         
-        # Save with unique timestamp
-        temp_path = os.path.join(self.temp_dir, f"caption_{int(time.time()*1000)}.png")
-        image.save(temp_path, "PNG")
-        print(f"Saved caption image to: {temp_path}")
-        
-        # Verify the image was created and has content
-        if os.path.exists(temp_path):
-            size = os.path.getsize(temp_path)
-            print(f"Caption file size: {size} bytes")
-            
-            # Load and verify the image
-            test_img = Image.open(temp_path)
-            print(f"Image size: {test_img.size}")
-            print(f"Image mode: {test_img.mode}")
-        else:
-            print("Warning: Caption file was not created!")
+        # Save under the content hash; the PNG is scratch input for ffmpeg,
+        # so the fastest deflate level is enough. It is written to a private
+        # file and renamed into place, so a concurrent job that finds the
+        # content-hash path never overlays a half-written PNG
+        fd, part_path = tempfile.mkstemp(dir=self.temp_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, "PNG", compress_level=1, optimize=False)
+            os.replace(part_path, temp_path)
+        except Exception:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        logger.debug("Saved caption image to %s", temp_path)
         
+        self._caption_cache[key] = temp_path
         return temp_path
     
     def create_tiktok_video(self, audio_path: str, text: str) -> str:
         """Create a TikTok video by combining audio with Subway Surfers gameplay."""
+        clip_path = None
         try:
             # 1. Check if video exists
             video_path = self.check_video_exists()
             
-            # 2. Get timing from audio transcription
-            segments = self.generate_captions(audio_path)
+            # 2. Get timing from audio transcription; the audio is decoded once
+            # and transcribed in the background while the gameplay is probed
+            audio_samples = _decode_audio(audio_path)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                segments_future = executor.submit(self.generate_captions, audio_samples)
+                
+                # Get video duration from the decoded audio
+                audio_duration = len(audio_samples) / _WHISPER_SAMPLE_RATE
+                
+                # Get random start time in the video
+                start_time = self.get_random_start_time(video_path, audio_duration)
+                logger.info("Starting video at %.2f seconds", start_time)
+                
+                segments = segments_future.result()
             
             # 3. Split text into sentences
-            text = ' '.join(text.split())  # Normalize spacing
-            sentences = []
-            for part in re.split('[.!?]', text):
-                part = part.strip()
-                if part:
-                    sentences.append(part)
+            text = _WS_RE.sub(' ', text).strip()  # Normalize spacing
+            sentences = [part.strip() for part in _SENT_SPLIT_RE.split(text) if part.strip()]
             
             # 4. Match sentences with audio segments
             captions = []
@@ -195,71 +528,120 @@ class VideoCreator:
                         'end': last_end + 3.0  # Default 3 seconds
                     })
             
-            # 5. Get video duration from audio
-            probe = ffmpeg.probe(audio_path)
-            audio_duration = float(probe['streams'][0]['duration'])
-            
-            # 6. Get random start time in the video
-            start_time = self.get_random_start_time(video_path, audio_duration)
-            print(f"Starting video at {start_time:.2f} seconds")
-            
-            # 7. Prepare video input with start time
-            video = ffmpeg.input(video_path, ss=start_time)
+            # 5. Cut the needed window out of the gameplay once with a stream
+            # copy, so the filter graph decodes megabytes instead of the whole
+            # source; the clip is looped on input if it comes out short, and
+            # decoded on the GPU when encoding there too
+            encoder = self.hw_encoder or _detect_h264_encoder()
+            # Jobs started in the same second (see create_batch) need distinct
+            # file names, so tag them with the inputs as well as the time
+            job_id = f"{int(time.time())}_{hashlib.sha1(f'{audio_path}|{text}'.encode('utf-8')).hexdigest()[:8]}"
+            clip_path = os.path.join(self.temp_dir, f"clip_{job_id}.mp4")
+            (
+                ffmpeg
+                .input(video_path, ss=start_time, t=audio_duration + 1)
+                .output(clip_path, c='copy', an=None)
+                .run(quiet=True, overwrite_output=True)
+            )
+            video = ffmpeg.input(clip_path, stream_loop=-1, **_HWACCEL_INPUT.get(encoder, {}))
             
-            # 8. Scale and pad video to TikTok dimensions (1080x1920)
+            # 6. Scale and pad video to TikTok dimensions (1080x1920)
             video = (
                 ffmpeg
-                .filter(video, 'scale', 1080, -1)  # Scale width to 1080, maintain aspect ratio
-                .filter('pad', 1080, 1920, '(ow-iw)/2', '(oh-ih)/2', color='black')  # Add black padding
+                .filter(video, 'scale', self._target_w, -1, flags='fast_bilinear')  # Scale width, maintain aspect ratio
+                .filter('pad', self._target_w, self._target_h, '(ow-iw)/2', '(oh-ih)/2', color='black')  # Add black padding
             )
             
-            # 9. Trim or loop video to match audio duration
-            video = ffmpeg.filter(video, 'loop', loop=0, size=str(int(audio_duration)))
+            # 7. Trim the looped clip to match audio duration
             video = ffmpeg.filter(video, 'trim', duration=audio_duration)
             
-            # 10. Add captions with fade effects
+            # 8. Add captions with fade effects, drawn by ffmpeg when it can
+            # render text itself and as PNG overlays otherwise
             caption_files = []
-            print("\nProcessing captions:")
-            for i, segment in enumerate(captions):
-                print(f"\nCaption {i+1}:")
-                print(f"Text: {segment['text']}")
-                print(f"Time: {segment['start']:.2f}s to {segment['end']:.2f}s")
-                
-                caption_path = self.create_caption_image(segment['text'], 1080, 1920)
-                caption_files.append(caption_path)
-                
-                # Add fade in/out effects
-                overlay = ffmpeg.input(caption_path)
-                overlay = ffmpeg.filter(overlay, 'fade', type='in', duration=0.2, start_time=segment['start'])
-                overlay = ffmpeg.filter(overlay, 'fade', type='out', duration=0.2, start_time=segment['end']-0.2)
+            fontfile = _find_caption_font()
+            use_drawtext = fontfile is not None and _has_ffmpeg_filter('drawtext')
+            if use_drawtext:
+                logger.info("Drawing captions with ffmpeg drawtext")
+                video = self.add_drawtext_captions(video, captions, fontfile, self._target_w)
+            else:
+                logger.info("Processing %d captions", len(captions))
+                # Rasterizing and PNG encoding run in C with the GIL released,
+                # so captions render in parallel across cores
+                with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                    caption_files = list(executor.map(
+                        lambda segment: self.create_caption_image(segment['text'], self._target_w, self._target_h),
+                        captions
+                    ))
                 
-                video = ffmpeg.overlay(video, overlay,
-                                     enable=f'between(t,{segment["start"]},{segment["end"]})')
+                for i, (segment, caption_path) in enumerate(zip(captions, caption_files)):
+                    logger.debug("Caption %d: %r from %.2fs to %.2fs",
+                                 i + 1, segment['text'], segment['start'], segment['end'])
+                    
+                    # Add fade in/out effects
+                    overlay = ffmpeg.input(caption_path)
+                    overlay = ffmpeg.filter(overlay, 'fade', type='in', duration=0.2, start_time=segment['start'])
+                    overlay = ffmpeg.filter(overlay, 'fade', type='out', duration=0.2, start_time=segment['end']-0.2)
+                    
+                    video = ffmpeg.overlay(video, overlay,
+                                         enable=f'between(t,{segment["start"]},{segment["end"]})')
             
-            # 11. Add audio
+            # 9. Add audio
             audio = ffmpeg.input(audio_path)
             
-            # 12. Combine everything with higher bitrate
-            output_path = os.path.join(self.output_dir, f"final_{int(time.time())}.mp4")
+            # 10. Combine everything, encoding on the GPU when one is available
+            output_path = os.path.join(self.output_dir, f"final_{job_id}.mp4")
+            logger.info("Encoding with %s", encoder)
             stream = ffmpeg.output(video, audio, output_path,
-                                 vcodec='libx264',
+                                 vcodec=encoder,
                                  acodec='aac',
-                                 video_bitrate='6M',  # Higher bitrate
                                  audio_bitrate='192k',
-                                 r=30)
+                                 r=30,
+                                 **_H264_ENCODERS.get(encoder, {'b:v': '6M'}))
+            # The caption and scaling graph runs on the CPU whatever the encoder
+            stream = stream.global_args('-filter_complex_threads', str(os.cpu_count() or 1))
             
-            # 13. Run the FFmpeg command
-            print("\nExecuting FFmpeg command...")
+            # 11. Run the FFmpeg command
+            logger.info("Executing FFmpeg command...")
             ffmpeg.run(stream, overwrite_output=True)
             
-            # 14. Keep temporary files for debugging
-            print("\nTemporary caption files (not deleted for debugging):")
+            # 12. Keep temporary caption files for debugging
             for file in caption_files:
-                if os.path.exists(file):
-                    print(f"- {file} ({os.path.getsize(file)} bytes)")
+                logger.debug("Kept temporary caption file %s", file)
             
             return output_path
             
         except Exception as e:
-            print(f"\nError creating TikTok video: {str(e)}")
-            raise 
\ No newline at end of file
+            logger.error("Error creating TikTok video: %s", e)
+            raise
+        
+        finally:
+            # The gameplay clip is only needed for this encode, successful or not
+            if clip_path and os.path.exists(clip_path):
+                os.remove(clip_path)
+    
+    def create_batch(self, jobs: List[Dict[str, str]], max_workers: Optional[int] = None) -> List[str]:
+        """
+        Create several TikTok videos concurrently.
+        
+        Each render spends most of its time in its own ffmpeg process, so the
+        jobs share this instance (and its loaded Whisper model) on threads.
+        GPU encoders have a small session limit, so they render one at a time.
+        
+        Args:
+            jobs (List[Dict[str, str]]): Dicts with 'audio_path' and 'text' keys
+            max_workers (Optional[int]): Concurrent renders; defaults to a
+                quarter of the cores for libx264 and 1 for hardware encoders
+            
+        Returns:
+            List[str]: Output video paths, in the same order as the jobs
+        """
+        if max_workers is None:
+            encoder = self.hw_encoder or _detect_h264_encoder()
+            # Each libx264 encode already threads, so only overlap a few of
+            # them to cover the single-threaded decode and setup stretches
+            max_workers = max(1, (os.cpu_count() or 1) // 4) if encoder == 'libx264' else 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda job: self.create_tiktok_video(job['audio_path'], job['text']),
+                jobs
+            )) 
\ No newline at end of file
@@ -1,14 +1,62 @@
 import os
 import pytest
+from pathlib import Path
 from dotenv import load_dotenv
 import sys
 
 # Add the project root directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sample_articles import SAMPLE_ARTICLES
+
+@pytest.fixture(scope="session")
+def sample_articles():
+    """Sample Greek news articles shared by the story tests"""
+    return SAMPLE_ARTICLES
+
+def pytest_addoption(parser):
+    parser.addoption("--run-live", action="store_true", default=False,
+                     help="run tests marked live, and hit the real news feeds and Gemini API")
+
+def pytest_configure(config):
+    """Load .env once at startup"""
+    load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'), override=False)
+
+@pytest.fixture(scope="session")
+def cached_generate_story(request):
+    """Generate stories, reusing live Gemini stories from tests/.llm_cache when LLM_CACHE=1
+    
+    Only the story fixtures go through this, so error-path tests always reach
+    the API, and only live runs may fill the cache, so canned test stories
+    never end up in it. The stories are kept by the generator's own STORY_CACHE,
+    whose atomic writes are safe when several xdist workers share the cache.
+    """
+    enabled = request.config.getoption("--run-live") and os.getenv('LLM_CACHE') == '1'
+    cache_dir = Path(__file__).parent / '.llm_cache'
+    
+    def generate(generator, articles):
+        if not enabled:
+            return generator.generate_story(articles)
+        previous = (generator.story_cache_enabled, generator.story_cache_dir)
+        generator.story_cache_enabled, generator.story_cache_dir = True, cache_dir
+        try:
+            return generator.generate_story(articles)
+        finally:
+            generator.story_cache_enabled, generator.story_cache_dir = previous
+    
+    return generate
+
+def pytest_collection_modifyitems(config, items):
+    """Skip tests that need the live network unless --run-live is given"""
+    if config.getoption("--run-live"):
+        return
+    skip_live = pytest.mark.skip(reason="needs --run-live")
+    for item in items:
+        if "live" in item.keywords:
+            item.add_marker(skip_live)
+
 @pytest.fixture(autouse=True)
 def load_env():
-    """Load environment variables before each test"""
-    load_dotenv()
+    """Check the environment loaded at startup before each test"""
     # Verify that the API key is loaded
     assert os.getenv('GEMINI_API_KEY') is not None, "GEMINI_API_KEY not found in environment variables" 
\ No newline at end of file
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+# Sample Greek news articles for testing
+SAMPLE_ARTICLES = [
+    {
+        "title": "Η Ελλάδα πρωτοπόρος στην πράσινη ενέργεια στην Ευρώπη",
+        "content": """Η Ελλάδα σημειώνει σημαντική πρόοδο στον τομέα των ανανεώσιμων πηγών ενέργειας, 
+        με τα φωτοβολταϊκά και αιολικά πάρκα να καλύπτουν πλέον το 40% των ενεργειακών αναγκών της χώρας. 
+        Σύμφωνα με πρόσφατη έκθεση της Ευρωπαϊκής Επιτροπής, η Ελλάδα κατατάσσεται στις πρώτες θέσεις 
+        στην ΕΕ όσον αφορά την αξιοποίηση της ηλιακής και αιολικής ενέργειας.""",
+        "source": "Καθημερινή",
+        "category": "economy",
+        "published": datetime.now().strftime('%Y-%m-%d'),
+        "url": "https://www.kathimerini.gr/green-energy"
+    },
+    {
+        "title": "Νέα επαναστατική ανακάλυψη Ελλήνων επιστημόνων στην τεχνητή νοημοσύνη",
+        "content": """Ομάδα Ελλήνων ερευνητών από το Εθνικό Μετσόβιο Πολυτεχνείο ανέπτυξε έναν νέο 
+        αλγόριθμο τεχνητής νοημοσύνης που μπορεί να προβλέψει με ακρίβεια 95% την εξέλιξη διαφόρων 
+        ασθενειών. Η ανακάλυψη αυτή αναμένεται να φέρει επανάσταση στον τομέα της ιατρικής διάγνωσης.""",
+        "source": "ΑΠΕ-ΜΠΕ",
+        "category": "technology",
+        "published": datetime.now().strftime('%Y-%m-%d'),
+        "url": "https://www.amna.gr/tech-discovery"
+    }
+]
+
+# Lowercase Greek letters, for checking a story is written in Greek
+GREEK_LOWER = frozenset('αβγδεζηθικλμνξοπρστυφχψω')
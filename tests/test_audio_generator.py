@@ -0,0 +1,50 @@
+import os
+import sys
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.audio_generator import AudioGenerator
+
+TEST_TEXT = "Γεια σας φίλοι μου! Σήμερα έχουμε μια τέλεια είδηση."
+
+@pytest.fixture
+def audio_generator(tmp_path, monkeypatch):
+    """Fixture to create an AudioGenerator with an isolated cache directory"""
+    monkeypatch.setenv('TTS_CACHE_DIR', str(tmp_path / 'cache'))
+    return AudioGenerator(api_key="test_key")
+
+@pytest.fixture
+def mock_tts_response(mocker):
+    """Fixture to mock a streamed ElevenLabs response"""
+    mock_response = mocker.MagicMock()
+    mock_response.status_code = 200
+    mock_response.iter_content.return_value = [b'ID3', b'audio-bytes']
+    mock_response.__enter__.return_value = mock_response
+    return mocker.patch('requests.Session.post', return_value=mock_response)
+
+def test_create_audio_writes_output_and_cache(audio_generator, mock_tts_response, tmp_path):
+    """Test that generated audio is saved and stored in the cache"""
+    output_file = tmp_path / 'out.mp3'
+
+    assert audio_generator.create_audio(TEST_TEXT, output_file=str(output_file))
+    assert output_file.read_bytes() == b'ID3audio-bytes'
+    assert len(list(audio_generator.cache_dir.glob('*.mp3'))) == 1
+    assert len(list(audio_generator.cache_dir.glob('*.json'))) == 1
+    assert not list(audio_generator.cache_dir.glob('*.part'))
+
+def test_create_audio_cache_hit_skips_request(audio_generator, mock_tts_response, tmp_path):
+    """Test that identical text is served from the cache without an API call"""
+    audio_generator.create_audio(TEST_TEXT, output_file=str(tmp_path / 'first.mp3'))
+    second_file = tmp_path / 'second.mp3'
+
+    assert audio_generator.create_audio(TEST_TEXT, output_file=str(second_file))
+    assert mock_tts_response.call_count == 1
+    assert second_file.read_bytes() == b'ID3audio-bytes'
+
+def test_format_news_text_keeps_sentence_terminators(audio_generator):
+    """Test that sentences split on . ! ? keep their punctuation and prosody"""
+    ssml = audio_generator._format_news_text("Τι έγινε? Πάνω από 10.000 άτομα. Τέλεια!")
+
+    assert ssml.startswith("<speak>") and ssml.endswith("</speak>")
+    assert "<prosody pitch='+20%' rate='90%'>Τι έγινε?</prosody> <break time='500ms'/>" in ssml
+    assert "10.000 άτομα. <break time='500ms'/>" in ssml
+    assert "<prosody pitch='+30%' rate='120%'>Τέλεια!</prosody>" in ssml
@@ -1,16 +1,35 @@
 import os
 import sys
-from datetime import datetime
+from collections import Counter
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
 from src.story_generator import StoryGenerator
-from test_story_generator import SAMPLE_ARTICLES
+from sample_articles import SAMPLE_ARTICLES, GREEK_LOWER
 
 # Load environment variables
 from dotenv import load_dotenv
 import os
 
+# Emotion markers, matched in one pass over the story
+_ALL_MARKERS = [f'[{name}]' for name in StoryGenerator._MARKERS]
+_MARKER_RE = StoryGenerator._MARKER_RE
+
+_REQUIRED_MARKERS = {
+    '[PAUSE]': 'Story must include [PAUSE] between topics',
+    '[EMPHASIS]': 'Story should include emphasized points',
+    '[EXCITED]': 'Story should include excited moments',
+    '[SERIOUS]': 'Story should include serious tone for news',
+    '[THINKING]': 'Story should include analytical moments',
+}
+
+# Properties of the fixed input articles that decide which markers are expected
+_CATEGORIES = frozenset(article['category'] for article in SAMPLE_ARTICLES)
+_HAS_STATS = any('95%' in article['content'] for article in SAMPLE_ARTICLES)
+
+def count_markers(story: str) -> Counter:
+    """Count each emotion marker in the story"""
+    return Counter(m.group(0) for m in _MARKER_RE.finditer(story))
 
 def validate_story(story: str) -> tuple[bool, list[str]]:
     """Validate the generated story meets all requirements"""
@@ -22,33 +41,21 @@ def validate_story(story: str) -> tuple[bool, list[str]]:
         issues.append(f"Story length ({words} words) is outside target range (150-450)")
     
     # Check for emotion markers
-    required_markers = {
-        '[PAUSE]': 'Story must include [PAUSE] between topics',
-        '[EMPHASIS]': 'Story should include emphasized points',
-        '[EXCITED]': 'Story should include excited moments',
-        '[SERIOUS]': 'Story should include serious tone for news',
-        '[THINKING]': 'Story should include analytical moments',
-    }
-    
-    found_markers = []
-    for marker in required_markers:
-        if marker in story:
-            found_markers.append(marker)
+    found_markers = count_markers(story).keys() & _REQUIRED_MARKERS.keys()
     
     if len(found_markers) < 3:
         issues.append(f"Found only {len(found_markers)} markers, minimum required is 3")
     
     # Check for Greek text
-    if not any(char in story for char in 'αβγδεζηθικλμνξοπρστυφχψω'):
+    if GREEK_LOWER.isdisjoint(story):
         issues.append("Story doesn't contain Greek text")
     
     # Check category-specific markers
-    categories_present = set(article['category'] for article in SAMPLE_ARTICLES)
-    if 'economy' in categories_present and '[SERIOUS]' not in story:
+    if 'economy' in _CATEGORIES and '[SERIOUS]' not in story:
         issues.append("Economic news should have [SERIOUS] marker")
-    if 'technology' in categories_present and '[EXCITED]' not in story:
+    if 'technology' in _CATEGORIES and '[EXCITED]' not in story:
         issues.append("Technology news should have [EXCITED] marker")
-    if any('95%' in article['content'] for article in SAMPLE_ARTICLES) and '[THINKING]' not in story:
+    if _HAS_STATS and '[THINKING]' not in story:
         issues.append("Articles with statistics should have [THINKING] marker")
     
     return len(issues) == 0, issues
@@ -63,17 +70,15 @@ def analyze_story(story: str) -> None:
     print(f"Speaking time (approx): {words/150:.1f} minutes")
     
     # Emotion markers
-    all_markers = ['[PAUSE]', '[EMPHASIS]', '[EXCITED]', '[SERIOUS]', 
-                  '[CURIOUS]', '[SMILE]', '[THINKING]']
-    marker_counts = {marker: story.count(marker) for marker in all_markers}
+    counts = count_markers(story)
+    marker_counts = {marker: counts[marker] for marker in _ALL_MARKERS}
     
     print("\nEmotion Markers:")
     for marker, count in marker_counts.items():
         print(f"  {marker}: {count} times")
     
     # Category coverage
-    categories = set(article['category'] for article in SAMPLE_ARTICLES)
-    print("\nInput Categories:", ', '.join(categories))
+    print("\nInput Categories:", ', '.join(_CATEGORIES))
     
     # Statistics
     print("\nStatistics:")
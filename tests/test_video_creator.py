@@ -0,0 +1,136 @@
+import os
+import sys
+import pytest
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ffmpeg
+import src.video_creator as video_creator_module
+from src.video_creator import VideoCreator
+
+@pytest.fixture
+def video_creator(tmp_path, monkeypatch, mocker):
+    """Fixture to create a VideoCreator in a scratch directory without loading Whisper"""
+    monkeypatch.chdir(tmp_path)
+    mocker.patch('src.video_creator._load_whisper')
+    return VideoCreator()
+
+@pytest.fixture
+def clear_encoder_cache():
+    """Forget the detected encoder before and after the test"""
+    video_creator_module._detect_h264_encoder.cache_clear()
+    yield
+    video_creator_module._detect_h264_encoder.cache_clear()
+
+def _completed(mocker, stdout='', returncode=0):
+    """Build a mocked subprocess.run result"""
+    return mocker.Mock(stdout=stdout, returncode=returncode)
+
+def test_drawtext_captions_escape_filter_text(video_creator):
+    """Test that caption text with filter-graph syntax is escaped in the compiled command"""
+    captions = [{'text': "Νέα: 50% 'τώρα'", 'start': 1.0, 'end': 3.0}]
+
+    video = video_creator.add_drawtext_captions(ffmpeg.input('in.mp4'), captions, 'missing.ttf', 1080)
+    args = ffmpeg.output(video, 'out.mp4').compile()
+
+    graph = args[args.index('-filter_complex') + 1]
+    assert graph.count('drawtext=') == 1
+    assert r"Νέα\\: 50% \\\'τώρα\\\'" in graph
+    assert 'expansion=none' in graph  # % is not expanded as a drawtext function
+    assert r'enable=between(t\,1.0\,3.0)' in graph
+
+def test_detect_h264_encoder_prefers_working_nvenc(mocker, clear_encoder_cache):
+    """Test that a listed hardware encoder is used once its test encode succeeds"""
+    mock_run = mocker.patch('src.video_creator.subprocess.run', side_effect=[
+        _completed(mocker, stdout=' V....D h264_nvenc  NVIDIA NVENC H.264 encoder\n V....D libx264  H.264'),
+        _completed(mocker, returncode=0)
+    ])
+
+    assert video_creator_module._detect_h264_encoder() == 'h264_nvenc'
+    assert '-c:v' in mock_run.call_args.args[0] and 'h264_nvenc' in mock_run.call_args.args[0]
+
+def test_detect_h264_encoder_falls_back_to_libx264(mocker, clear_encoder_cache):
+    """Test that a listed encoder without a usable device falls back to x264"""
+    mocker.patch('src.video_creator.subprocess.run', side_effect=[
+        _completed(mocker, stdout=' V....D h264_nvenc  NVIDIA NVENC H.264 encoder\n V....D libx264  H.264'),
+        _completed(mocker, returncode=1)
+    ])
+
+    assert video_creator_module._detect_h264_encoder() == 'libx264'
+
+def test_probe_duration_uses_container_duration_when_stream_has_none(mocker):
+    """Test that ffprobe's N/A stream duration is skipped in favour of the format duration"""
+    mock_run = mocker.patch('src.video_creator.subprocess.run', return_value=_completed(mocker, stdout='N/A\n12.5\n'))
+
+    assert video_creator_module._probe_duration('clip.mp4', 'v:0') == 12.5
+    assert mock_run.call_args.args[0][-1] == 'clip.mp4'
+
+def test_probe_duration_raises_without_any_duration(mocker):
+    """Test that a file with no reported duration is rejected"""
+    mocker.patch('src.video_creator.subprocess.run', return_value=_completed(mocker, stdout='N/A\nN/A\n'))
+
+    with pytest.raises(ValueError):
+        video_creator_module._probe_duration('clip.mp4', 'a:0')
+
+def test_create_caption_image_reuses_cached_png(video_creator, mocker):
+    """Test that identical captions are rendered once and served from the content-hash path"""
+    new_image = mocker.spy(video_creator_module.Image, 'new')
+
+    first = video_creator.create_caption_image('Γεια σου κόσμε', 1080, 1920)
+    second = video_creator.create_caption_image('Γεια σου κόσμε', 1080, 1920)
+
+    assert first == second
+    assert os.path.exists(first)
+    assert new_image.call_count == 1
+    assert not [name for name in os.listdir(video_creator.temp_dir) if name.endswith('.part')]
+
+def _mock_pipeline(video_creator, mocker):
+    """Patch everything around the ffmpeg graph so create_tiktok_video only builds commands"""
+    mocker.patch.object(video_creator, 'check_video_exists', return_value='gameplay.mp4')
+    mocker.patch.object(video_creator, 'get_random_start_time', return_value=10.0)
+    mocker.patch.object(video_creator, 'generate_captions', return_value=[{'start': 0.0, 'end': 2.0, 'text': 'Γεια'}])
+    mocker.patch('src.video_creator._decode_audio', return_value=np.zeros(16000 * 5, dtype=np.float32))
+    mocker.patch('src.video_creator._detect_h264_encoder', return_value='libx264')
+    mocker.patch('src.video_creator._find_caption_font', return_value='missing.ttf')
+    mocker.patch('src.video_creator._has_ffmpeg_filter', return_value=True)
+
+def _popen(mocker, returncode=0):
+    """Build a mocked ffmpeg process"""
+    process = mocker.Mock()
+    process.communicate.return_value = (b'', b'')
+    process.poll.return_value = returncode
+    return process
+
+def test_create_tiktok_video_stream_copies_the_gameplay_window(video_creator, mocker):
+    """Test that the gameplay window is cut with a stream copy and looped on input"""
+    _mock_pipeline(video_creator, mocker)
+    mock_popen = mocker.patch('ffmpeg._run.subprocess.Popen', side_effect=[_popen(mocker), _popen(mocker)])
+
+    video_creator.create_tiktok_video('narration.mp3', 'Γεια.')
+
+    cut_args, encode_args = (call.args[0] for call in mock_popen.call_args_list)
+    clip_path = cut_args[cut_args.index('-y') - 1]
+    assert cut_args[:7] == ['ffmpeg', '-ss', '10.0', '-t', '6.0', '-i', 'gameplay.mp4']
+    assert ['-c', 'copy'] == cut_args[cut_args.index('-c'):cut_args.index('-c') + 2]
+    assert '-an' in cut_args
+    assert encode_args[1:5] == ['-stream_loop', '-1', '-i', clip_path]
+    assert 'loop=' not in encode_args[encode_args.index('-filter_complex') + 1]
+    assert encode_args[encode_args.index('-vcodec') + 1] == 'libx264'
+    assert encode_args[encode_args.index('-maxrate') + 1] == '6M'
+
+def test_create_tiktok_video_removes_clip_when_encoding_fails(video_creator, mocker):
+    """Test that the temporary gameplay clip is cleaned up after a failed encode"""
+    _mock_pipeline(video_creator, mocker)
+    clip_paths = []
+    def popen(args, **kwargs):
+        if clip_paths:
+            return _popen(mocker, returncode=1)
+        clip_paths.append(args[args.index('-y') - 1])
+        with open(clip_paths[0], 'wb') as f:
+            f.write(b'clip')
+        return _popen(mocker)
+    mocker.patch('ffmpeg._run.subprocess.Popen', side_effect=popen)
+
+    with pytest.raises(ffmpeg.Error):
+        video_creator.create_tiktok_video('narration.mp3', 'Γεια.')
+
+    assert not os.path.exists(clip_paths[0])